@@ -2,10 +2,12 @@
 
 __all__ = [
     "backtester",
+    "portfolio",
     "signals",
     "ranking",
     "aggregation",
     "costs",
+    "ledger",
     "metrics",
     "utils",
 ]
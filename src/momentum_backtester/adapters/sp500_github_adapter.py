@@ -1,10 +1,16 @@
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from dataclasses import dataclass
+from typing import Any, Callable, Iterator, Optional
+import queue
+import sqlite3
+import threading
+import time
 import pandas as pd
+from tqdm import tqdm
 
-from academic_data_download.db_manager.wrds_sql import get_sp500_constituents_snapshot, get_crsp_daily_by_permno_by_year
-from academic_data_download.utils.wrds_connect import connect_wrds
 import os
 import dotenv
 import warnings
@@ -28,17 +34,17 @@ def load_tiny_sample() -> SP500Universe:
 
 
 def load_sp500_data_wrds(start_year: int, end_year: int) -> dict:
+    # imported here so the offline (sqlite / duckdb) loaders do not need the WRDS stack
+    from academic_data_download.db_manager.wrds_sql import get_sp500_constituents_snapshot, get_crsp_daily_by_permno_by_year
+    from academic_data_download.utils.wrds_connect import connect_wrds
+
     print("Loading SP500 data...")
     db = connect_wrds(username=os.getenv("WRDS_USERNAME"), password=os.getenv("WRDS_PASSWORD"))
 
     # get spy 
     spy_daily = get_crsp_daily_by_permno_by_year(db, ["84398"], 'all')
     spy_daily = spy_daily.query(f"date >= '{start_year}-01-01' and date <= '{end_year}-12-31'")
-    spy_daily['date'] = pd.to_datetime(spy_daily['date'])
-    spy_daily['adjclose'] = spy_daily['prc'] / spy_daily['cfacpr']
-    spy_daily['adjopen'] = spy_daily['openprc'] / spy_daily['cfacpr']
-    spy_daily['ret_oto'] = spy_daily.groupby('permno')['adjopen'].transform(lambda x: x.pct_change())
-    spy_daily['nav'] = (1.0 + spy_daily['ret'].shift(-1)).cumprod()
+    spy_daily = _prepare_spy(spy_daily)
 
     sp500_universes = []
     price_df = []
@@ -58,6 +64,283 @@ def load_sp500_data_wrds(start_year: int, end_year: int) -> dict:
                 gvkeys=constituents["gvkey"].unique(), 
                 permnos=constituents["permno"].unique(), 
                 ))
+    return _build_sp500_panel(spy_daily, price_df, sp500_universes)
+
+
+SPY_PERMNO = 84398
+
+# S&P 500 snapshot for the parallel loader: every membership spell overlapping the year,
+# linked to gvkey / gsector through CCM. start / ending feed the membership mask.
+_CONSTITUENTS_SQL = """
+    SELECT DISTINCT l.gvkey, s.permno, c.gsector, s.start, s.ending
+    FROM crsp.dsp500list AS s
+    JOIN crsp.ccmxpf_linktable AS l
+      ON l.lpermno = s.permno
+     AND l.linktype IN ('LU', 'LC')
+     AND l.linkprim IN ('P', 'C')
+     AND l.linkdt <= '{year}-12-31'
+     AND COALESCE(l.linkenddt, '9999-12-31') >= '{year}-01-01'
+    LEFT JOIN comp.company AS c ON c.gvkey = l.gvkey
+    WHERE s.start <= '{year}-12-31' AND s.ending >= '{year}-01-01'
+"""
+
+_CRSP_DAILY_SQL = """
+    SELECT permno, date, prc, openprc, cfacpr, ret
+    FROM crsp.dsf
+    WHERE permno IN ({permnos})
+      AND date >= '{start}' AND date <= '{end}'
+"""
+
+# SQLSTATEs worth retrying: class 08 (connection exception) and server shutdown / restart
+_TRANSIENT_SQLSTATE_PREFIXES = ("08", "57P01", "57P02", "57P03")
+# sqlite primary result codes SQLITE_BUSY / SQLITE_LOCKED
+_TRANSIENT_SQLITE_CODES = (5, 6)
+
+
+def _clean_constituents(constituents: pd.DataFrame) -> pd.DataFrame:
+    constituents = constituents[['gvkey', 'permno', 'gsector', 'start', 'ending']].copy()
+    constituents['permno'] = constituents['permno'].astype(int)
+    constituents['start'] = pd.to_datetime(constituents['start'])
+    constituents['ending'] = pd.to_datetime(constituents['ending'], errors="coerce").fillna(pd.Timestamp.max)
+    return constituents
+
+
+def _attach_constituents(crsp_daily: pd.DataFrame, constituents: dict[int, pd.DataFrame]) -> pd.DataFrame:
+    """
+    Attach gvkey / gsector to each CRSP row from the snapshot of that row's own year,
+    keeping only (year, permno) pairs in that snapshot, exactly as the serial loader's
+    per-year left merge does.
+    """
+    snapshots = pd.concat(
+        [df[['gvkey', 'permno', 'gsector']].assign(year=year) for year, df in constituents.items()]
+    ).drop_duplicates()
+    crsp_daily = crsp_daily.copy()
+    crsp_daily['permno'] = crsp_daily['permno'].astype(int)
+    crsp_daily['date'] = pd.to_datetime(crsp_daily['date'])
+    crsp_daily['year'] = crsp_daily['date'].dt.year
+    crsp_daily = pd.merge(crsp_daily, snapshots, on=["year", "permno"], how="inner").drop(columns=['year'])
+    crsp_daily['permno'] = crsp_daily['permno'].astype(str) # convert permno to string for easier querying
+    return crsp_daily
+
+
+def _membership_mask(price_df_long: pd.DataFrame, constituents: dict[int, pd.DataFrame]) -> pd.DataFrame:
+    """Wide boolean frame: True where the name is inside one of its S&P 500 membership spells."""
+    spells = pd.concat(constituents.values())[['permno', 'start', 'ending']].drop_duplicates()
+    spells['permno'] = spells['permno'].astype(str)
+    rows = price_df_long[['date', 'permno']].drop_duplicates().merge(spells, on="permno", how="left")
+    rows['in_index'] = (rows['date'] >= rows['start']) & (rows['date'] <= rows['ending'])
+    in_index = rows.groupby(['date', 'permno'])['in_index'].any()
+    return in_index.unstack(fill_value=False).astype(bool)
+
+
+class _ConnectionPool:
+    """Small blocking pool: at most `size` connections, opened lazily and reused across queries."""
+
+    def __init__(self, connect: Callable[[], Any], size: int) -> None:
+        self._connect = connect
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        with self._slots:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+            try:
+                yield conn
+            except Exception:
+                # a failed query may leave the connection unusable, so do not hand it out again
+                _close_quietly(conn)
+                raise
+            self._idle.put(conn)
+
+    def close(self) -> None:
+        while not self._idle.empty():
+            _close_quietly(self._idle.get_nowait())
+
+
+def _close_quietly(conn: Any) -> None:
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
+def _run_sql(conn: Any, sql: str) -> pd.DataFrame:
+    # wrds.Connection exposes raw_sql; local stand-ins (sqlite3, duckdb) go through the DB-API path
+    if hasattr(conn, "raw_sql"):
+        return conn.raw_sql(sql)
+    return pd.read_sql_query(sql, conn)
+
+
+def _is_transient(e: BaseException | None) -> bool:
+    """
+    True only for connection-level failures (dropped / busy connection), classified per
+    driver by error code. Syntax errors, missing tables, cancelled queries etc. are permanent.
+    """
+    # pandas / SQLAlchemy wrap the driver error, so walk down to it
+    while e is not None:
+        if isinstance(e, (ConnectionError, TimeoutError)):
+            return True
+        if getattr(e, "connection_invalidated", False):  # SQLAlchemy: the connection was dropped
+            return True
+        if isinstance(e, sqlite3.Error):
+            code = getattr(e, "sqlite_errorcode", None)
+            if code is not None:
+                return code & 0xFF in _TRANSIENT_SQLITE_CODES
+            return isinstance(e, sqlite3.OperationalError) and ("locked" in str(e) or "busy" in str(e))
+        module = type(e).__module__
+        if module.startswith("psycopg"):
+            sqlstate = getattr(e, "pgcode", None) or getattr(e, "sqlstate", None)
+            if sqlstate is not None:
+                return sqlstate.startswith(_TRANSIENT_SQLSTATE_PREFIXES)
+            # no SQLSTATE: the client lost the server before it answered
+            return type(e).__name__ in ("OperationalError", "InterfaceError")
+        if module.startswith("duckdb"):
+            return type(e).__name__ == "ConnectionException"
+        e = e.__cause__ or getattr(e, "orig", None)
+    return False
+
+
+def _query_with_retry(pool: _ConnectionPool, sql: str, max_retries: int, backoff: float) -> pd.DataFrame:
+    for attempt in range(max_retries + 1):
+        try:
+            with pool.connection() as conn:
+                return _run_sql(conn, sql)
+        except Exception as e:
+            # only connection-level failures are retried, anything else would fail again
+            if attempt == max_retries or not _is_transient(e):
+                raise
+            wait = backoff * 2 ** attempt
+            tqdm.write(f"query failed ({e!r}), retrying in {wait:.1f}s ({attempt + 1}/{max_retries})")
+            time.sleep(wait)
+
+
+def load_sp500_data_wrds_parallel(
+    start_year: int,
+    end_year: int,
+    max_workers: int = 4,
+    years_per_query: int = 1,
+    batch_size: Optional[int] = None,
+    max_retries: int = 3,
+    backoff: float = 1.0,
+    connect: Optional[Callable[[], Any]] = None,
+) -> dict:
+    """
+    Concurrent version of `load_sp500_data_wrds`, returning the same dict plus a
+    "membership_df_wide" mask.
+
+    Constituent snapshots for all years are fetched first. The CRSP daily queries then
+    group `years_per_query` consecutive years into one query over the union of their
+    permnos and the combined date range, and run together with the date-filtered SPY
+    query over a pool of at most `max_workers` reused connections. As in the serial
+    loader, each name keeps its full-year prices for every year it is in that year's
+    snapshot, tagged with that year's gvkey / gsector. The universe comes from the SQL
+    snapshot below rather than `get_sp500_constituents_snapshot`.
+
+    "membership_df_wide" (date x permno, bool) is True inside each name's index
+    membership spell, so callers can mask signals for names not yet (or no longer) in
+    the index without losing the price history the signals need.
+
+    Trade-off: a larger `years_per_query` means fewer round trips, but each query also
+    returns rows for years a name is not a constituent (discarded locally) and leaves
+    fewer queries to run in parallel. `batch_size` optionally splits the
+    permno IN-list of each query; None (default) sends one list per query.
+
+    Queries are retried up to `max_retries` times with exponential backoff starting at
+    `backoff` seconds, but only on connection-level errors (SQLSTATE class 08, sqlite
+    busy / locked, dropped connections); any other error is raised at once.
+
+    `connect` builds one connection; it defaults to WRDS with the env credentials. Any
+    DB-API connection whose `crsp` / `comp` schemas hold dsp500list, ccmxpf_linktable,
+    dsf and company works, e.g. a sqlite3 connection (check_same_thread=False) with
+    those schemas attached, which keeps the loader testable offline.
+    """
+    if years_per_query < 1:
+        raise ValueError(f"Invalid years_per_query: {years_per_query}")
+    if connect is None:
+        from academic_data_download.utils.wrds_connect import connect_wrds
+
+        def connect():
+            return connect_wrds(username=os.getenv("WRDS_USERNAME"), password=os.getenv("WRDS_PASSWORD"))
+
+    print("Loading SP500 data...")
+    years = list(range(start_year, end_year + 1))
+    pool = _ConnectionPool(connect, max_workers)
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            t0 = time.perf_counter()
+            futures = {
+                executor.submit(_query_with_retry, pool, _CONSTITUENTS_SQL.format(year=year), max_retries, backoff): year
+                for year in years
+            }
+            constituents = {}
+            for fut in tqdm(as_completed(futures), total=len(futures), desc="constituents", unit="year"):
+                constituents[futures[fut]] = _clean_constituents(fut.result())
+            tqdm.write(f"constituents for {len(years)} years loaded in {time.perf_counter() - t0:.1f}s")
+
+            t0 = time.perf_counter()
+            spy_future = executor.submit(
+                _query_with_retry,
+                pool,
+                _CRSP_DAILY_SQL.format(permnos=SPY_PERMNO, start=f"{start_year}-01-01", end=f"{end_year}-12-31"),
+                max_retries,
+                backoff,
+            )
+            futures = []
+            for i in range(0, len(years), years_per_query):
+                chunk = years[i:i + years_per_query]
+                permnos = sorted(set().union(*(constituents[year]['permno'] for year in chunk)))
+                step = batch_size or max(len(permnos), 1)
+                for j in range(0, len(permnos), step):
+                    sql = _CRSP_DAILY_SQL.format(
+                        permnos=", ".join(str(p) for p in permnos[j:j + step]),
+                        start=f"{chunk[0]}-01-01",
+                        end=f"{chunk[-1]}-12-31",
+                    )
+                    futures.append(executor.submit(_query_with_retry, pool, sql, max_retries, backoff))
+            crsp_frames = [
+                fut.result()
+                for fut in tqdm(as_completed(futures), total=len(futures), desc="crsp daily", unit="query")
+            ]
+            spy_daily = spy_future.result()
+            tqdm.write(f"crsp daily ({len(futures)} queries) and SPY loaded in {time.perf_counter() - t0:.1f}s")
+    finally:
+        pool.close()
+
+    spy_daily = _prepare_spy(spy_daily.sort_values('date').reset_index(drop=True))
+
+    crsp_daily = pd.concat(crsp_frames) if crsp_frames else pd.DataFrame(
+        columns=['permno', 'date', 'prc', 'openprc', 'cfacpr', 'ret'])
+    crsp_daily = _attach_constituents(crsp_daily, constituents).sort_values(['permno', 'date'])
+
+    sp500_universes = [
+        SP500Universe(
+            year=year,
+            gvkeys=constituents[year]["gvkey"].unique(),
+            permnos=constituents[year]["permno"].unique(),
+            )
+        for year in years
+    ]
+    data = _build_sp500_panel(spy_daily, [crsp_daily], sp500_universes)
+    data["membership_df_wide"] = _membership_mask(data["price_df_long"], constituents).reindex(
+        index=data["adjclose_df_wide"].index, columns=data["adjclose_df_wide"].columns, fill_value=False)
+    return data
+
+
+def _prepare_spy(spy_daily: pd.DataFrame) -> pd.DataFrame:
+    spy_daily['date'] = pd.to_datetime(spy_daily['date'])
+    spy_daily['adjclose'] = spy_daily['prc'] / spy_daily['cfacpr']
+    spy_daily['adjopen'] = spy_daily['openprc'] / spy_daily['cfacpr']
+    spy_daily['ret_oto'] = spy_daily.groupby('permno')['adjopen'].transform(lambda x: x.pct_change())
+    spy_daily['nav'] = (1.0 + spy_daily['ret'].shift(-1)).cumprod()
+    return spy_daily
+
+
+def _build_sp500_panel(spy_daily: pd.DataFrame, price_df: list[pd.DataFrame], sp500_universes: list[SP500Universe]) -> dict:
+    """Turn the per-year CRSP daily frames into the long and wide panels the backtester consumes."""
     price_df_long = pd.concat(price_df)
     price_df_long['date'] = pd.to_datetime(price_df_long['date'])
     price_df_long['adjclose'] = price_df_long['prc'] / price_df_long['cfacpr']
@@ -183,7 +183,136 @@ class Analysis:
         plt.legend()
         plt.grid(True, linestyle="--", alpha=0.6)
         plt.savefig(os.path.join(self.output_dir, "rolling_beta.png"))
-    
+
+    def rolling_regression(
+        self,
+        returns: pd.Series | pd.DataFrame,
+        factors: pd.DataFrame,
+        window: int | None = 252,
+        min_periods: int | None = None,
+    ) -> dict:
+        """
+        Rolling (or expanding) OLS of many strategy return series on many factors.
+
+        Every strategy column is regressed on an intercept plus all factor columns,
+        over a trailing window of `window` observations (expanding when `window` is None).
+        Instead of fitting one OLS per window, the cross products X'X, X'y and y'y are
+        accumulated once with cumulative sums and differenced at the window boundaries,
+        so all windows and all strategies are solved in one vectorized pass.
+
+        Rows where any factor is missing are dropped; a missing strategy return only
+        removes that row from that strategy's windows. X'X and its inverse are shared by
+        all strategies with the same missing-data pattern, so memory grows with T·k² per
+        distinct pattern rather than per strategy.
+
+        Parameters
+        ----------
+        returns : pd.Series or pd.DataFrame
+            Strategy returns indexed by date, one column per strategy.
+        factors : pd.DataFrame
+            Factor returns indexed by date (e.g. market, size, value, sector ETFs),
+            already aligned in time with `returns`.
+        window : int or None, default 252
+            Number of observations in each rolling window, None for an expanding window.
+        min_periods : int, optional
+            Minimum valid observations required for an estimate. Defaults to `window`
+            (or number of regressors + 2 for an expanding window).
+
+        Returns
+        -------
+        dict
+            "params": per-period coefficients, columns MultiIndex (strategy, term) where
+            term is "alpha" followed by the factor names.
+            "tvalues": t-statistics, same layout as "params".
+            "r2": R² per strategy.
+            "nobs": number of observations used per strategy.
+
+        Raises
+        ------
+        ValueError
+            If `window` is smaller than 1.
+        """
+        if window is not None and window < 1:
+            raise ValueError(f"Invalid window: {window}")
+        if isinstance(returns, pd.Series):
+            returns = returns.to_frame(name=returns.name if returns.name is not None else "strategy")
+        factors = factors.apply(pd.to_numeric, errors="coerce").replace([np.inf, -np.inf], np.nan).dropna()
+        returns = returns.apply(pd.to_numeric, errors="coerce").replace([np.inf, -np.inf], np.nan)
+        returns = returns.reindex(factors.index)
+
+        terms = ["alpha"] + list(factors.columns)
+        k = len(terms)
+        if min_periods is None:
+            min_periods = window if window is not None else k + 2
+        min_periods = max(int(min_periods), k + 1)  # need at least one residual degree of freedom
+
+        X = np.column_stack([np.ones(len(factors)), factors.to_numpy(dtype=float)])  # (T, k)
+        valid = returns.notna().to_numpy()  # (T, m)
+        Y = np.where(valid, returns.to_numpy(dtype=float), 0.0)  # (T, m)
+        T, m = Y.shape
+
+        def _window_sum(a: np.ndarray) -> np.ndarray:
+            # running totals, differenced in place at the window boundary
+            np.cumsum(a, axis=0, out=a)
+            if window is not None:
+                a[window:] -= a[:-window]
+            return a
+
+        beta = np.full((T, m, k), np.nan)
+        tvals = np.full((T, m, k), np.nan)
+        r2 = np.full((T, m), np.nan)
+        nobs = np.zeros((T, m), dtype=int)
+
+        # X'X only depends on a strategy through its missing-data mask, so it is built and
+        # inverted once per distinct mask (once in total when every strategy is fully observed)
+        groups: dict = {}
+        for j in range(m):
+            groups.setdefault(valid[:, j].tobytes(), []).append(j)
+
+        for cols in groups.values():
+            mask = valid[:, cols[0]]
+            Xm = X * mask[:, None]
+            n = _window_sum(mask.astype(float))  # (T,)
+            sxx = _window_sum(np.einsum("tk,tl->tkl", Xm, Xm))  # (T, k, k)
+            sxy = _window_sum(np.einsum("tk,tm->tmk", X, Y[:, cols]))  # (T, g, k)
+            syy = _window_sum(Y[:, cols] ** 2)  # (T, g)
+
+            ok = n >= min_periods
+            # swap in the identity for windows without enough data so the batched inverse never fails
+            sxx[~ok] = np.eye(k)
+            try:
+                xx_inv = np.linalg.inv(sxx)
+            except np.linalg.LinAlgError:
+                xx_inv = np.linalg.pinv(sxx)
+
+            b = np.einsum("tkl,tml->tmk", xx_inv, sxy)
+            ssr = np.clip(syy - np.einsum("tmk,tmk->tm", b, sxy), 0.0, None)
+            dof = np.where(ok, n - k, np.nan)
+            sigma2 = ssr / dof[:, None]
+            diag = np.clip(np.diagonal(xx_inv, axis1=-2, axis2=-1), 0.0, None)  # (T, k)
+            se = np.sqrt(diag[:, None, :] * sigma2[..., None])
+            with np.errstate(divide="ignore", invalid="ignore"):
+                t = b / se
+                # centered R² since every regression carries an intercept (sum y is the alpha row of X'y)
+                sst = syy - sxy[..., 0] ** 2 / n[:, None]
+                r = 1.0 - ssr / sst
+
+            b[~ok] = np.nan
+            t[~ok] = np.nan
+            r[~ok] = np.nan
+            beta[:, cols] = b
+            tvals[:, cols] = t
+            r2[:, cols] = r
+            nobs[:, cols] = np.rint(n).astype(int)[:, None]
+
+        columns = pd.MultiIndex.from_product([returns.columns, terms], names=["strategy", "term"])
+        return {
+            "params": pd.DataFrame(beta.reshape(T, m * k), index=factors.index, columns=columns),
+            "tvalues": pd.DataFrame(tvals.reshape(T, m * k), index=factors.index, columns=columns),
+            "r2": pd.DataFrame(r2, index=factors.index, columns=returns.columns),
+            "nobs": pd.DataFrame(nobs, index=factors.index, columns=returns.columns),
+        }
+
     # TODO: fix to make checksum = 0
     def return_attr_sector(
         self,
@@ -8,6 +8,7 @@ import pandas as pd
 import warnings
 warnings.filterwarnings("ignore")
 
+from .ledger import holdings_ledger
 from .utils import MonthEndCalendar
 
 
@@ -16,7 +17,12 @@ RankFunc = Callable[[pd.DataFrame], pd.DataFrame]
 AggFunc = Callable[[pd.DataFrame, pd.DataFrame], pd.DataFrame]
 CostFunc = Callable[[pd.DataFrame], pd.Series]
 
-class Backtester:
+class _PanelBacktester:
+    """
+    Stages shared by every backtester: the sorted data panel, the rebalance calendar,
+    signal masking, weight alignment and the return / cost / ledger assembly.
+    """
+
     def __init__(
         self,
         retoto_df_wide: pd.DataFrame,
@@ -24,56 +30,47 @@ class Backtester:
         adjclose_df_wide: pd.DataFrame,
         adjopen_df_wide: pd.DataFrame,
         sector_df_wide: pd.DataFrame,
-        signal: SignalFunc,
-        ranker: RankFunc,
-        aggregator: AggFunc,
         costs: CostFunc,
         rebal_freq: str = "M",
+        ledger: bool = False,
     ) -> None:
         self.retoto_df_wide = retoto_df_wide.sort_index()
         self.retctc_df_wide = retctc_df_wide.sort_index()
         self.adjclose_df_wide = adjclose_df_wide.sort_index()
         self.adjopen_df_wide = adjopen_df_wide.sort_index()
         self.sector_df_wide = sector_df_wide.sort_index()
-        self.signal = signal
-        self.ranker = ranker
-        self.aggregator = aggregator
         self.costs = costs
         self.calendar = MonthEndCalendar()
         self.rebal_freq = rebal_freq
+        self.ledger = ledger
 
-    def run(self) -> Dict[str, pd.DataFrame | pd.Series]:
+    def _rebal_dates(self) -> pd.DatetimeIndex:
         if self.rebal_freq == "D":
-            rebal_dates = self.calendar.day_ends(self.retctc_df_wide.index)
+            return self.calendar.day_ends(self.retctc_df_wide.index)
         elif self.rebal_freq == "M":
-            rebal_dates = self.calendar.month_ends(self.retctc_df_wide.index)
-        else:
-            raise ValueError(f"Invalid rebalance frequency: {self.rebal_freq}")
-        # print(rebal_dates)
+            return self.calendar.month_ends(self.retctc_df_wide.index)
+        raise ValueError(f"Invalid rebalance frequency: {self.rebal_freq}")
 
-        signals = self.signal(self.adjclose_df_wide)
+    def _signals(self, signal: SignalFunc) -> pd.DataFrame:
+        signals = signal(self.adjclose_df_wide)
 
         # make signals nan if the corresponding adjclose is nan
         # the reason that adjclose_df_wide is nan could be due to delisting or the company no longer in sp500, in either case, the signal should be nan
-        signals = signals.where(self.adjclose_df_wide.notna(), np.nan)
-
-        ranks = self.ranker(signals.loc[rebal_dates])
-        # print(ranks.tail())
+        return signals.where(self.adjclose_df_wide.notna(), np.nan)
 
-        weights = self.aggregator(ranks, self.sector_df_wide)
-        weights = weights.reindex(self.retoto_df_wide.index).ffill().fillna(0.0)
-        # print(weights.tail())
+    def _weights(self, aggregator: AggFunc, ranks: pd.DataFrame) -> pd.DataFrame:
+        weights = aggregator(ranks, self.sector_df_wide)
+        return weights.reindex(self.retoto_df_wide.index).ffill().fillna(0.0)
 
-        port_rets = (weights * self.retoto_df_wide.shift(-1)).sum(axis=1)
+    def _returns(self, weights: pd.DataFrame) -> Dict[str, pd.DataFrame | pd.Series | dict]:
+        contributions = weights * self.retoto_df_wide.shift(-1)
+        port_rets = contributions.sum(axis=1)
 
         tc = self.costs(weights)
         net_rets = port_rets - tc.reindex(port_rets.index).fillna(0.0)
 
         equity = (1.0 + net_rets).cumprod()
-        return {
-            "weights": weights,
-            "signal": signals,
-            "ranks": ranks,
+        results = {
             "gross_returns": port_rets,
             "transaction_costs": tc,
             "net_returns": net_rets,
@@ -81,5 +78,49 @@ class Backtester:
             # raw input
             "retoto_df_wide": self.retoto_df_wide,
         }
+        if self.ledger:
+            # per-leg / per-sector / per-name breakdown from the same contribution product
+            results["ledger"] = holdings_ledger(weights, contributions, self.sector_df_wide)
+        return results
+
 
+class Backtester(_PanelBacktester):
+    def __init__(
+        self,
+        retoto_df_wide: pd.DataFrame,
+        retctc_df_wide: pd.DataFrame,
+        adjclose_df_wide: pd.DataFrame,
+        adjopen_df_wide: pd.DataFrame,
+        sector_df_wide: pd.DataFrame,
+        signal: SignalFunc,
+        ranker: RankFunc,
+        aggregator: AggFunc,
+        costs: CostFunc,
+        rebal_freq: str = "M",
+        ledger: bool = False,
+    ) -> None:
+        super().__init__(
+            retoto_df_wide,
+            retctc_df_wide,
+            adjclose_df_wide,
+            adjopen_df_wide,
+            sector_df_wide,
+            costs=costs,
+            rebal_freq=rebal_freq,
+            ledger=ledger,
+        )
+        self.signal = signal
+        self.ranker = ranker
+        self.aggregator = aggregator
 
+    def run(self) -> Dict[str, pd.DataFrame | pd.Series]:
+        rebal_dates = self._rebal_dates()
+        signals = self._signals(self.signal)
+        ranks = self.ranker(signals.loc[rebal_dates])
+        weights = self._weights(self.aggregator, ranks)
+        return {
+            "weights": weights,
+            "signal": signals,
+            "ranks": ranks,
+            **self._returns(weights),
+        }
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+
+def holdings_ledger(
+    weights: pd.DataFrame,
+    contributions: pd.DataFrame,
+    sectors: pd.DataFrame,
+) -> Dict[str, pd.DataFrame | pd.Series]:
+    """
+    Break the portfolio return down by leg, sector and name.
+
+    `contributions` is the weight * forward return product the backtester already
+    computes for the gross return, so the ledger adds no second pass over the returns.
+    Only non-zero positions are kept (long/columnar), so callers can drop the dense
+    weights and return matrices afterwards.
+
+    Parameters
+    ----------
+    weights : pd.DataFrame
+        Wide weights, index = dates, columns = tickers.
+    contributions : pd.DataFrame
+        Wide per-name return contributions (weight * next period return), same shape as `weights`.
+    sectors : pd.DataFrame
+        Wide sector labels, reindexed onto `weights`.
+
+    Returns
+    -------
+    dict
+        "positions": one row per (date, name) with a non-zero weight; columns date, permno,
+        sector, weight, contribution and cum_contribution (running P&L of that name).
+        "exposure": long, short, gross and net exposure per date.
+        "leg_contributions": long and short leg contributions to portfolio return per date.
+        "leg_returns": long and short leg returns, i.e. contributions divided by the leg's
+        absolute exposure (the short column is the return earned by being short).
+        "sector_net_exposure": net weight per sector per date.
+        "sector_returns": return contribution per sector per date.
+        "name_pnl": total arithmetic contribution per name over the run.
+    """
+    dates = weights.index
+    w = weights.to_numpy(dtype=float)
+    c = np.nan_to_num(contributions.reindex(index=dates, columns=weights.columns).to_numpy(dtype=float))
+    s = sectors.reindex(index=dates, columns=weights.columns).to_numpy()
+
+    long_w = np.where(w > 0, w, 0.0)
+    short_w = np.where(w < 0, w, 0.0)
+    exposure = pd.DataFrame(
+        {
+            "long": long_w.sum(axis=1),
+            "short": short_w.sum(axis=1),
+            "gross": np.abs(w).sum(axis=1),
+            "net": w.sum(axis=1),
+        },
+        index=dates,
+    )
+    leg_contributions = pd.DataFrame(
+        {
+            "long": np.where(w > 0, c, 0.0).sum(axis=1),
+            "short": np.where(w < 0, c, 0.0).sum(axis=1),
+        },
+        index=dates,
+    )
+    # return of each leg per unit of its own exposure; nan on dates the leg is empty
+    leg_returns = pd.DataFrame(
+        {
+            "long": leg_contributions["long"] / exposure["long"].replace(0.0, np.nan),
+            "short": leg_contributions["short"] / -exposure["short"].replace(0.0, np.nan),
+        },
+        index=dates,
+    )
+
+    # compact columnar store: only the names actually held
+    t_idx, n_idx = np.nonzero(w)
+    positions = pd.DataFrame(
+        {
+            "date": dates[t_idx],
+            "permno": weights.columns[n_idx],
+            "sector": s[t_idx, n_idx],
+            "weight": w[t_idx, n_idx],
+            "contribution": c[t_idx, n_idx],
+        }
+    )
+    positions["cum_contribution"] = positions.groupby("permno")["contribution"].cumsum()
+
+    by_sector = positions.groupby(["date", "sector"], dropna=False)[["weight", "contribution"]].sum()
+    sector_net_exposure = by_sector["weight"].unstack(fill_value=0.0).reindex(dates, fill_value=0.0)
+    sector_returns = by_sector["contribution"].unstack(fill_value=0.0).reindex(dates, fill_value=0.0)
+
+    name_pnl = positions.groupby("permno")["contribution"].sum().sort_values()
+
+    return {
+        "positions": positions,
+        "exposure": exposure,
+        "leg_contributions": leg_contributions,
+        "leg_returns": leg_returns,
+        "sector_net_exposure": sector_net_exposure,
+        "sector_returns": sector_returns,
+        "name_pnl": name_pnl,
+    }
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+import warnings
+warnings.filterwarnings("ignore")
+
+from .backtester import AggFunc, CostFunc, RankFunc, SignalFunc, _PanelBacktester
+
+
+@dataclass
+class StrategySpec:
+    """
+    One book: a signal, a ranker and an aggregator.
+
+    Stages are deduplicated by callable identity, so books only share a stage when they
+    hold the very same function object. Build shared stages once and reuse them, e.g.
+    `mom = lambda px: price_momentum(px, 11, 1)` passed to every momentum book, instead
+    of writing a fresh lambda per book.
+    """
+
+    signal: SignalFunc
+    ranker: RankFunc
+    aggregator: AggFunc
+
+
+class MultiStrategyBacktester(_PanelBacktester):
+    """
+    Run several signal/ranker/aggregator books on one shared data panel and combine them.
+
+    The five wide frames are sorted once and shared by every book. Books that pass the
+    same signal (or signal + ranker) object compute that stage only once, e.g. momentum
+    long-short and long-only sharing one momentum signal and one ranking.
+
+    Books are combined into a single weight matrix with either static allocations or
+    inverse-volatility (risk-parity) allocations reset on rebalance dates. Transaction
+    costs and the optional ledger are computed on the combined weights, so offsetting
+    trades across books net out before costs.
+    """
+
+    def __init__(
+        self,
+        retoto_df_wide: pd.DataFrame,
+        retctc_df_wide: pd.DataFrame,
+        adjclose_df_wide: pd.DataFrame,
+        adjopen_df_wide: pd.DataFrame,
+        sector_df_wide: pd.DataFrame,
+        strategies: Dict[str, StrategySpec],
+        costs: CostFunc,
+        allocation: str = "static",
+        static_weights: Optional[Dict[str, float]] = None,
+        vol_window: int = 63,
+        rebal_freq: str = "M",
+        ledger: bool = False,
+    ) -> None:
+        if not strategies:
+            raise ValueError("strategies must contain at least one StrategySpec")
+        if allocation not in ("static", "risk_parity"):
+            raise ValueError(f"Invalid allocation: {allocation}")
+        if static_weights is not None and set(static_weights) != set(strategies):
+            raise ValueError(
+                f"static_weights keys {sorted(static_weights)} do not match strategies {sorted(strategies)}"
+            )
+        if vol_window < 2:
+            raise ValueError(f"Invalid vol_window: {vol_window}")
+        super().__init__(
+            retoto_df_wide,
+            retctc_df_wide,
+            adjclose_df_wide,
+            adjopen_df_wide,
+            sector_df_wide,
+            costs=costs,
+            rebal_freq=rebal_freq,
+            ledger=ledger,
+        )
+        self.strategies = strategies
+        self.allocation = allocation
+        self.static_weights = static_weights
+        self.vol_window = vol_window
+
+    def _allocations(
+        self,
+        book_returns: pd.DataFrame,
+        book_gross: pd.DataFrame,
+        rebal_dates: pd.DatetimeIndex,
+    ) -> pd.DataFrame:
+        names = list(book_returns.columns)
+        if self.allocation == "static":
+            if self.static_weights is None:
+                static = pd.Series(1.0 / len(names), index=names)
+            else:
+                static = pd.Series(self.static_weights, dtype=float).reindex(names)
+            return pd.DataFrame(
+                np.tile(static.to_numpy(), (len(book_returns), 1)),
+                index=book_returns.index,
+                columns=names,
+            )
+        elif self.allocation == "risk_parity":
+            # a book without positions (e.g. before its first rebalance) has no return to measure
+            held_returns = book_returns.where(book_gross > 0)
+            # book_returns[t] is realised over t -> t+1, so shift to only use what is known at t
+            vol = held_returns.shift(1).rolling(self.vol_window, min_periods=self.vol_window).std()
+            inv_vol = (1.0 / vol).replace([np.inf, -np.inf], np.nan)
+            alloc = inv_vol.div(inv_vol.sum(axis=1), axis=0)
+            # equal split until every book has a full vol window
+            alloc = alloc.where(alloc.notna().all(axis=1), 1.0 / len(names), axis=0)
+            alloc = alloc.loc[rebal_dates].reindex(book_returns.index).ffill()
+            return alloc.fillna(1.0 / len(names))
+        raise ValueError(f"Invalid allocation: {self.allocation}")
+
+    def run(self) -> Dict[str, pd.DataFrame | pd.Series | dict]:
+        rebal_dates = self._rebal_dates()
+        fwd_rets = self.retoto_df_wide.shift(-1)
+
+        # stage caches keyed by callable identity, so shared stages run once
+        signal_cache: Dict[int, pd.DataFrame] = {}
+        rank_cache: Dict[tuple, pd.DataFrame] = {}
+        weight_cache: Dict[tuple, pd.DataFrame] = {}
+
+        signals, ranks, book_weights, book_returns, book_gross = {}, {}, {}, {}, {}
+        for name, spec in self.strategies.items():
+            s_key = id(spec.signal)
+            if s_key not in signal_cache:
+                signal_cache[s_key] = self._signals(spec.signal)
+            r_key = (s_key, id(spec.ranker))
+            if r_key not in rank_cache:
+                rank_cache[r_key] = spec.ranker(signal_cache[s_key].loc[rebal_dates])
+            w_key = r_key + (id(spec.aggregator),)
+            if w_key not in weight_cache:
+                weight_cache[w_key] = self._weights(spec.aggregator, rank_cache[r_key])
+
+            signals[name] = signal_cache[s_key]
+            ranks[name] = rank_cache[r_key]
+            book_weights[name] = weight_cache[w_key]
+            book_returns[name] = (book_weights[name] * fwd_rets).sum(axis=1)
+            book_gross[name] = book_weights[name].abs().sum(axis=1)
+
+        book_returns = pd.DataFrame(book_returns)
+        allocations = self._allocations(book_returns, pd.DataFrame(book_gross), rebal_dates)
+
+        weights = sum(book_weights[name].mul(allocations[name], axis=0) for name in self.strategies)
+        weights = weights.fillna(0.0)
+
+        return {
+            "weights": weights,
+            "allocations": allocations,
+            "book_weights": book_weights,
+            "book_returns": book_returns,
+            "signal": signals,
+            "ranks": ranks,
+            # costs and ledger on the netted book, not per sub-book
+            **self._returns(weights),
+        }
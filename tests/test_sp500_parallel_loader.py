@@ -0,0 +1,159 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from momentum_backtester.adapters.sp500_github_adapter import SPY_PERMNO, load_sp500_data_wrds_parallel
+
+# 10001-10003 are members through 2021, 10004 joins the index in June 2020, 10005 leaves at end-2020
+MEMBERS = {
+    10001: ("1990-01-01", "2021-12-31"),
+    10002: ("1990-01-01", "2021-12-31"),
+    10003: ("1990-01-01", "2021-12-31"),
+    10004: ("2020-06-01", "2021-12-31"),
+    10005: ("1990-01-01", "2020-12-31"),
+}
+
+
+@pytest.fixture
+def wrds_standin(tmp_path):
+    """SQLite files laid out like the WRDS `crsp` / `comp` schemas."""
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range("2019-06-01", "2022-03-31").strftime("%Y-%m-%d")
+    permnos = list(MEMBERS) + [SPY_PERMNO]
+
+    crsp = sqlite3.connect(tmp_path / "crsp.db")
+    pd.DataFrame(
+        [
+            (permno, date, 50.0 + i, 49.5 + i, 1.0, rng.normal(0, 0.01))
+            for permno in permnos
+            for i, date in enumerate(dates)
+        ],
+        columns=["permno", "date", "prc", "openprc", "cfacpr", "ret"],
+    ).to_sql("dsf", crsp, index=False)
+    pd.DataFrame(
+        [(permno, start, ending) for permno, (start, ending) in MEMBERS.items()],
+        columns=["permno", "start", "ending"],
+    ).to_sql("dsp500list", crsp, index=False)
+    pd.DataFrame(
+        {
+            "gvkey": [f"{permno - 10000:06d}" for permno in MEMBERS],
+            "lpermno": list(MEMBERS),
+            "linktype": "LC",
+            "linkprim": "P",
+            "linkdt": "1980-01-01",
+            "linkenddt": None,
+        }
+    ).to_sql("ccmxpf_linktable", crsp, index=False)
+    crsp.commit()
+    crsp.close()
+
+    comp = sqlite3.connect(tmp_path / "comp.db")
+    pd.DataFrame(
+        {"gvkey": [f"{permno - 10000:06d}" for permno in MEMBERS], "gsector": ["10", "10", "20", "20", "45"]}
+    ).to_sql("company", comp, index=False)
+    comp.commit()
+    comp.close()
+
+    def connect():
+        conn = sqlite3.connect(":memory:", check_same_thread=False)
+        conn.execute(f"ATTACH DATABASE '{tmp_path / 'crsp.db'}' AS crsp")
+        conn.execute(f"ATTACH DATABASE '{tmp_path / 'comp.db'}' AS comp")
+        return conn
+
+    return connect
+
+
+def test_universe_and_membership_mask(wrds_standin):
+    data = load_sp500_data_wrds_parallel(2020, 2021, max_workers=2, connect=wrds_standin)
+
+    adjclose = data["adjclose_df_wide"]
+    membership = data["membership_df_wide"]
+    assert adjclose.index.min() == pd.Timestamp("2020-01-01")
+    assert adjclose.index.max() == pd.Timestamp("2021-12-31")
+    assert membership.shape == adjclose.shape
+
+    # a mid-year joiner keeps its full-year price history, the mask marks when it is in the index
+    assert adjclose.loc["2020-01-01":, "10004"].notna().all()
+    assert not membership.loc[:"2020-05-29", "10004"].any()
+    assert membership.loc["2020-06-01":, "10004"].all()
+    # a leaver is not in the next year's snapshot (beyond the ffill(limit=3) carried by the panel)
+    assert adjclose.loc["2021-01-08":, "10005"].isna().all()
+    assert not membership.loc["2021-01-01":, "10005"].any()
+
+    universes = {u.year: set(u.permnos) for u in data["sp500_universes"]}
+    assert universes[2020] == {10001, 10002, 10003, 10004, 10005}
+    assert universes[2021] == {10001, 10002, 10003, 10004}
+
+    # SPY date filter is pushed into the query
+    assert data["spy_daily"]["date"].min() >= pd.Timestamp("2020-01-01")
+    assert data["spy_daily"]["date"].max() <= pd.Timestamp("2021-12-31")
+
+
+@pytest.mark.parametrize("years_per_query", [1, 2])
+def test_gvkey_link_change_between_years(wrds_standin, tmp_path, years_per_query):
+    # 10001 moves to a new gvkey at the turn of the year
+    crsp = sqlite3.connect(tmp_path / "crsp.db")
+    crsp.execute("UPDATE ccmxpf_linktable SET linkenddt = '2020-12-31' WHERE lpermno = 10001")
+    crsp.execute("INSERT INTO ccmxpf_linktable VALUES ('000099', 10001, 'LC', 'P', '2021-01-01', NULL)")
+    crsp.commit()
+    crsp.close()
+    comp = sqlite3.connect(tmp_path / "comp.db")
+    comp.execute("INSERT INTO company VALUES ('000099', '15')")
+    comp.commit()
+    comp.close()
+
+    data = load_sp500_data_wrds_parallel(2020, 2021, years_per_query=years_per_query, connect=wrds_standin)
+
+    assert data["adjclose_df_wide"]["10001"].notna().all()
+    sectors = data["sector_df_wide"]["10001"]
+    assert (sectors.loc[:"2020-12-31"] == "10").all()
+    assert (sectors.loc["2021-01-01":] == "15").all()
+    assert set(data["price_df_long"].query("permno == '10001'")["gvkey"]) == {"000001", "000099"}
+
+
+def test_query_batching_does_not_change_panel(wrds_standin):
+    base = load_sp500_data_wrds_parallel(2020, 2021, connect=wrds_standin)
+    batched = load_sp500_data_wrds_parallel(2020, 2021, years_per_query=2, batch_size=2, connect=wrds_standin)
+
+    pd.testing.assert_frame_equal(base["retoto_df_wide"], batched["retoto_df_wide"])
+    pd.testing.assert_frame_equal(base["sector_df_wide"], batched["sector_df_wide"])
+
+
+def test_retries_transient_errors_only(wrds_standin):
+    calls = {"n": 0}
+
+    def flaky_connect():
+        calls["n"] += 1
+        if calls["n"] <= 2:
+            raise sqlite3.OperationalError("database is locked")
+        return wrds_standin()
+
+    data = load_sp500_data_wrds_parallel(2020, 2020, max_workers=1, backoff=0.0, connect=flaky_connect)
+    assert not data["adjclose_df_wide"].empty
+
+    calls["n"] = 0
+
+    def broken_connect():
+        calls["n"] += 1
+        raise sqlite3.ProgrammingError("bad query")
+
+    with pytest.raises(sqlite3.ProgrammingError):
+        load_sp500_data_wrds_parallel(2020, 2020, max_workers=1, backoff=0.0, connect=broken_connect)
+    assert calls["n"] == 1
+
+
+def test_permanent_query_error_is_not_retried(tmp_path, wrds_standin):
+    calls = {"n": 0}
+
+    def connect_without_comp():
+        # comp is not attached, so the constituent query fails with "no such table"
+        calls["n"] += 1
+        conn = sqlite3.connect(":memory:", check_same_thread=False)
+        conn.execute(f"ATTACH DATABASE '{tmp_path / 'crsp.db'}' AS crsp")
+        return conn
+
+    with pytest.raises(Exception, match="no such table"):
+        load_sp500_data_wrds_parallel(2020, 2020, max_workers=1, backoff=10.0, connect=connect_without_comp)
+    assert calls["n"] == 1